@@ -1,29 +1,147 @@
 import psycopg2
+import psycopg2.pool
+from psycopg2.extras import execute_batch, execute_values
+import atexit
+import itertools
+import logging
+import os
 import sys
+import threading
+import weakref
 import traceback
 import re  # For collapsing whitespace, like the Java 'replaceAll(" +", " ")'
 
+logger = logging.getLogger(__name__)
+
+# Any run of whitespace (including newlines), collapsed in execution messages
+_WS_RE = re.compile(r'\s+')
+
+# Row-returning statements that DECLARE ... CURSOR accepts
+_DECLARABLE_RE = re.compile(r'^\s*(SELECT|WITH|VALUES)\b', re.IGNORECASE)
+
+# An INSERT whose VALUES list is a single %s for execute_values(), optionally
+# followed by a clause without placeholders (RETURNING, ON CONFLICT, ...)
+_INSERT_VALUES_RE = re.compile(r'^\s*INSERT\s+INTO\b.*\bVALUES\s*%s\b(?!.*%s)', re.IGNORECASE | re.DOTALL)
+# A RETURNING clause, whose rows execute_values() must fetch page by page
+_RETURNING_RE = re.compile(r'\bRETURNING\b', re.IGNORECASE)
+
+# Decodes NUMERIC (oid 1700) as float rather than decimal.Decimal; results
+# such as SUM()/AVG() are only printed, so the exact type isn't needed.
+# Registered per connection in _initialize, not process-wide.
+NUMERIC_FLOAT = psycopg2.extensions.new_type(
+    (1700,), 'NUMERIC_FLOAT', lambda value, cursor: float(value) if value is not None else None
+)
+
+# One connection pool per set of connect() arguments, created lazily
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+# Rows pulled per FETCH when streaming from a server-side cursor
+_ITERSIZE = 2000
+# Rows formatted per sys.stdout.write() call when printing a result set
+_PRINT_CHUNK = 4096
+# (pool, schema) pairs that have already run QueryExecutor.INDEXES
+_INDEXED_POOLS = set()
+# Pooled connections whose session settings are already applied. A WeakSet
+# rather than id()s, so a recycled id can't be mistaken for a configured one.
+_CONFIGURED_CONNS = weakref.WeakSet()
+# Roughly (cores * 2) + spindles, capped so we don't exhaust max_connections
+_POOL_MAXCONN = min(4 * (os.cpu_count() or 1), 25)
+
+
+def _get_pool(*args, **kwargs):
+    """ Returns the shared pool for these connect() arguments, creating it if needed """
+    key = (args, tuple(sorted(kwargs.items())))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = psycopg2.pool.ThreadedConnectionPool(1, _POOL_MAXCONN, *args, **kwargs)
+            _POOLS[key] = pool
+    return pool
+
+
+def _banner(label):
+    """ Returns the three-line 'Question <label>' banner as one string """
+    return (
+        "////////////////////////////////\n"
+        f"//////////// Question {label:<6}////\n"
+        "////////////////////////////////\n"
+    )
+
+
+@atexit.register
+def _close_pools():
+    """ Closes every pooled connection when the interpreter exits """
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.closeall()
+        _POOLS.clear()
+        _INDEXED_POOLS.clear()
+
 class QueryExecutor:
     # --- Class variables translated from Java static finals ---
     PG_USER = "postgres"
     PG_PASSWORD = ""
     PG_HOST = "localhost"
     PG_PORT_NUMBER = "5432"
-    
-    # Java: private static String SUPABASE_CONN = null;
-    _SUPABASE_CONN = None
 
-    def __init__(self, dbname, schema_name="wine"):
+    # Indexes on the join/filter columns used by the wine questions, built by
+    # create_indexes(). '{schema}' is replaced with the quoted schema name.
+    INDEXES = (
+        "CREATE INDEX IF NOT EXISTS idx_po_supnr ON {schema}.purchase_order(supnr)",
+        "CREATE INDEX IF NOT EXISTS idx_supplies_supnr ON {schema}.supplies(supnr)",
+        "CREATE INDEX IF NOT EXISTS idx_po_line_prodnr ON {schema}.po_line(prodnr)",
+        # Partial index matching the 7.11E/7.15E prodtype predicates
+        "CREATE INDEX IF NOT EXISTS idx_product_prodtype ON {schema}.product(prodtype)"
+        " WHERE prodtype IN ('sparkling', 'red')",
+    )
+
+    def __init__(self, dbname, schema_name="wine", conn_kwargs=None):
         """
         Python's constructor, equivalent to the two Java constructors.
         It accepts a required 'dbname' and an optional 'schema_name'.
+        'conn_kwargs' overrides or extends the arguments given to connect()
+        (e.g. host/user/password for a hosted database such as Supabase).
         """
         # Java: private String schema_name = "wine";
         self._schema_name = schema_name
         self._dbname = dbname
+        # Java: this.execute("set search_path to " + this.schema_name);
+        # Sent as a startup option so the server applies it while connecting.
+        # The schema is quoted for SQL, then spaces/backslashes escaped for libpq.
+        self._schema_ident = '"{}"'.format(schema_name.replace('"', '""'))
+        search_path = self._schema_ident + ",public"
+        self._options = "-c search_path=" + re.sub(r'([\\ ])', r'\\\1', search_path)
+
+        # This is the equivalent of the Java 'Properties' passed to 'DriverManager.getConnection'
+        self._conn_kwargs = {
+            "dbname": dbname,
+            "user": QueryExecutor.PG_USER,
+            "password": QueryExecutor.PG_PASSWORD,
+            "host": QueryExecutor.PG_HOST,
+            "port": QueryExecutor.PG_PORT_NUMBER,
+            # *** FIX FOR ENCODING ERROR ***
+            # Set this to the value you found in psql
+            "client_encoding": "UTF8",
+            "options": self._options,
+        }
+        if conn_kwargs:
+            conn_kwargs = dict(conn_kwargs)
+            # Keep the search_path option alongside any caller-supplied ones
+            extra_options = conn_kwargs.pop("options", None)
+            if extra_options:
+                self._conn_kwargs["options"] = f"{self._options} {extra_options}"
+            self._conn_kwargs.update(conn_kwargs)
         
         # Java: Connection connection = null;
         self.connection = None
+        self._pool = None
+        self._cur = None
+
+        # Only format "Executed the query" messages for an interactive terminal
+        self._verbose = sys.stdout.isatty()
+
+        # Names of server-side prepared statements created by prepare()
+        self._prepared = {}
         
         # Call the initialize method, just like the Java constructor
         self._initialize()
@@ -31,61 +149,89 @@ class QueryExecutor:
     def _initialize(self):
         """
         Equivalent to the private void initialize() method in Java.
-        Establishes the connection and sets the schema.
+        Establishes the connection; the schema is set by the startup options.
         """
         try:
-            if self._SUPABASE_CONN is None:
-                # This is the equivalent of the Java 'Properties' and 'DriverManager.getConnection'
-                self.connection = psycopg2.connect(
-                    dbname=self._dbname,
-                    user=QueryExecutor.PG_USER,
-                    password=QueryExecutor.PG_PASSWORD,
-                    host=QueryExecutor.PG_HOST,
-                    port=QueryExecutor.PG_PORT_NUMBER,
-                    
-                    # *** FIX FOR ENCODING ERROR ***
-                    # Set this to the value you found in psql
-                    client_encoding='UTF8' 
-                )
-            else:
-                # Logic to handle the SUPABASE_CONN if it were set
-                self.connection = psycopg2.connect(
-                    self._SUPABASE_CONN,
-                    client_encoding='UTF8'
-                )
-                
+            # Connections are borrowed from a pool shared by identical kwargs
+            self._pool = _get_pool(**self._conn_kwargs)
+            self.connection = self._pool.getconn()
+
             # *** CRITICAL ***
             # This matches the Java code's behavior where 'execute'
             # works without needing a 'commit()'.
             self.connection.autocommit = True
 
+            # One long-lived cursor for everything except server-side cursors
+            self._cur = self.connection.cursor()
+
+            # Session settings survive putconn(), so apply them once per connection
+            with _POOLS_LOCK:
+                configured = self.connection in _CONFIGURED_CONNS
+            if not configured:
+                # Only our own connections get floats for NUMERIC columns
+                psycopg2.extensions.register_type(NUMERIC_FLOAT, self.connection)
+
+                # Keep prepared statements on custom plans (PostgreSQL 12+).
+                # server_version comes from the startup packet, no round-trip.
+                if self.connection.server_version >= 120000:
+                    self._cur.execute("SET plan_cache_mode = 'force_custom_plan'")
+
+                with _POOLS_LOCK:
+                    _CONFIGURED_CONNS.add(self.connection)
+
         except psycopg2.Error as e:
+            # 'qe' is never assigned if __init__ fails, so nothing else would
+            # return the borrowed connection; discard it instead of leaking it
+            if self.connection is not None:
+                self._pool.putconn(self.connection, close=True)
+                self.connection = None
+                self._cur = None
             self._handle_sql_exception(e)
 
         print("Successfully connected to Postgres.")
-        
-        # Java: this.execute("set search_path to " + this.schema_name);
-        try:
-            with self.connection.cursor() as cursor:
-                # Safely set the search path, adding 'public' is good practice
-                cursor.execute(f"SET search_path TO {psycopg2.extensions.quote_ident(self._schema_name, self.connection)}, public;")
-        except psycopg2.Error as e:
-             self._handle_sql_exception(e)
-             
+
         # Java: System.out.format("Using schema '%s'.\n\n", this.schema_name);
         print(f"Using schema '{self._schema_name}'.\n")
 
+    def create_indexes(self):
+        """
+        Creates INDEXES in this instance's schema, once per pool.
+        Opt-in: it needs CREATE rights and the builds block writes.
+        """
+        key = (id(self._pool), self._schema_name)
+        with _POOLS_LOCK:
+            if key in _INDEXED_POOLS:
+                return
+            _INDEXED_POOLS.add(key)
+        try:
+            # All the CREATE INDEX statements go out in a single round-trip
+            self._cur.execute(";\n".join(
+                sql.format(schema=self._schema_ident) for sql in self.INDEXES
+            ))
+        except psycopg2.Error as e:
+            with _POOLS_LOCK:
+                _INDEXED_POOLS.discard(key)
+            self._handle_sql_exception(e)
+
     def get_connection(self):
         """ Equivalent to public Connection getConnection() """
         return self.connection
 
     def _handle_sql_exception(self, e):
-        """ Equivalent to public void handleSQLException(SQLException var1) """
-        # Java: var1.printStackTrace();
-        traceback.print_exc()
-        # Java: System.exit(0);
-        print("\nExiting due to SQL error.")
-        sys.exit(0)
+        """
+        Equivalent to public void handleSQLException(SQLException var1)
+        Unlike the Java version this doesn't exit: it rolls back and re-raises
+        so the caller's 'finally' can still hand the connection back.
+        Must be called from inside the 'except' block that caught 'e'.
+        """
+        # A no-op under autocommit; a failure here (e.g. the connection is
+        # gone) must not replace the original error
+        if self.connection is not None and not self.connection.closed:
+            try:
+                self.connection.rollback()
+            except psycopg2.Error:
+                pass
+        raise
 
     def _print_result_set(self, cursor):
         """ 
@@ -94,6 +240,9 @@ class QueryExecutor:
         """
         print("Result set:")
         try:
+            # Server-side (named) cursors only learn their columns on the first fetch
+            first_rows = cursor.fetchmany(cursor.itersize) if cursor.name else []
+
             # Java: ResultSetMetaData var2 = var1.getMetaData();
             # Headers are in cursor.description
             if cursor.description is None:
@@ -107,12 +256,23 @@ class QueryExecutor:
             print(" | ".join(headers))
             
             # Java: while(var1.next())
-            results = cursor.fetchall()
+            # One "%s | %s | ..." template per result set; '%' stringifies in C
+            fmt = " | ".join(["%s"] * len(headers))
+
+            # Iterating streams named cursors in 'itersize' chunks. A short
+            # first fetch means the cursor is exhausted, so skip another FETCH.
+            if cursor.name and len(first_rows) < cursor.itersize:
+                rows = iter(first_rows)
+            else:
+                rows = itertools.chain(first_rows, cursor)
             row_count = 0
-            for row in results:
-                row_count += 1
-                # Java: Building the string row
-                print(" | ".join(map(str, row)))
+            while True:
+                chunk = list(itertools.islice(rows, _PRINT_CHUNK))
+                if not chunk:
+                    break
+                row_count += len(chunk)
+                # Java: Building the string row, one write per chunk
+                sys.stdout.write("\n".join([fmt % row for row in chunk]) + "\n")
 
             # Java: System.out.println("Number of rows: " + var4);
             print(f"Number of rows: {row_count}")
@@ -121,15 +281,22 @@ class QueryExecutor:
             self._handle_sql_exception(e)
 
     def _print_execution_message(self, query):
-        """ Equivalent to private void printExecutionMessage(String var1) """
+        """
+        Equivalent to private void printExecutionMessage(String var1)
+        Skipped when stdout is not a TTY; the query is then logged at DEBUG.
+        """
+        if not self._verbose:
+            logger.debug("Executed the query %r", query)
+            return
+
         if len(query) > 55:
             msg = query[:55] + "..."
         else:
             msg = query
             
         # Java: var2 = var2.replace('\n', ' ').trim().replaceAll(" +", " ");
-        # This is the Python way to "collapse" all whitespace
-        msg = re.sub(r'\s+', ' ', msg.replace('\n', ' ')).strip()
+        # \s already covers '\n', so one precompiled pass collapses everything
+        msg = _WS_RE.sub(' ', msg).strip()
         
         # Java: System.out.format("Executed the query \"%s\"\n", var2);
         print(f'Executed the query "{msg}"')
@@ -140,24 +307,92 @@ class QueryExecutor:
         Used for queries that don't return results (e.g., SET, CREATE, INSERT)
         """
         try:
-            # The 'with' block handles 'try-with-resources' and closing
-            with self.connection.cursor() as cursor:
-                # Java: var2.execute(var1);
-                cursor.execute(query)
+            # Reuses the long-lived cursor instead of opening one per call
+            cursor = self._cur
+            # Java: var2.execute(var1);
+            cursor.execute(query)
         except psycopg2.Error as e:
             self._handle_sql_exception(e)
         
         self._print_execution_message(query)
 
-    def execute_query(self, query, print_results=True):
+    def execute_many(self, query, argslist):
+        """
+        Runs 'query' once per entry in 'argslist' in a few round-trips.
+        "INSERT INTO ... VALUES %s" goes through execute_values, which
+        builds multi-row VALUES lists; everything else uses execute_batch.
+        Returns the rows of an "INSERT ... VALUES %s RETURNING ..." from
+        every page, otherwise None.
+        """
+        rows = None
+        try:
+            cursor = self._cur
+            if _INSERT_VALUES_RE.match(query):
+                fetch = _RETURNING_RE.search(query) is not None
+                rows = execute_values(cursor, query, argslist, page_size=1000, fetch=fetch)
+            else:
+                execute_batch(cursor, query, argslist, page_size=500)
+        except psycopg2.Error as e:
+            self._handle_sql_exception(e)
+
+        self._print_execution_message(query)
+        return rows
+
+    def prepare(self, name, query):
+        """
+        Creates a server-side prepared statement so repeated executions
+        skip the parse and plan steps. Does nothing if 'name' is known.
+        """
+        if name in self._prepared:
+            return
+        try:
+            self._cur.execute(f"PREPARE {psycopg2.extensions.quote_ident(name, self.connection)} AS {query}")
+        except psycopg2.Error as e:
+            self._handle_sql_exception(e)
+        self._prepared[name] = query
+
+    def execute_prepared(self, name, params=(), print_results=True):
+        """ Runs a statement created by prepare() with the given parameters """
+        sql = f"EXECUTE {psycopg2.extensions.quote_ident(name, self.connection)}"
+        if params:
+            sql += "(" + ", ".join(["%s"] * len(params)) + ")"
+        try:
+            cursor = self._cur
+            cursor.execute(sql, params)
+            # 'name' may have been prepared outside prepare()
+            self._print_execution_message(self._prepared.get(name, sql))
+            if print_results:
+                self._print_result_set(cursor)
+        except psycopg2.Error as e:
+            self._handle_sql_exception(e)
+
+    def execute_query(self, query, print_results=True, stream=False):
         """
         Equivalent to the overloaded methods:
         public void executeQuery(String var1)
         public void executeQuery(String var1, boolean var2)
+        With stream=True a printed SELECT/WITH/VALUES is read through a
+        server-side cursor in 'itersize' chunks, keeping client memory flat
+        for very large results at the cost of extra round-trips.
         """
+        # The shared cursor needs a single round-trip, so it is the default.
+        # DECLARE accepts nothing but SELECT/WITH/VALUES, so SHOW, EXPLAIN,
+        # INSERT ... RETURNING etc. always use it.
+        if not (stream and print_results and _DECLARABLE_RE.match(query)):
+            try:
+                self._cur.execute(query)
+                self._print_execution_message(query)
+                if print_results:
+                    self._print_result_set(self._cur)
+            except psycopg2.Error as e:
+                self._handle_sql_exception(e)
+            return
+
         try:
-            # 'with' block handles closing the cursor
-            with self.connection.cursor() as cursor:
+            # 'with' block handles closing the cursor. A named cursor keeps the
+            # rows on the server; withhold=True is required under autocommit.
+            with self.connection.cursor(name=f"q_{id(query)}", withhold=True) as cursor:
+                cursor.itersize = _ITERSIZE
                 # Java: ResultSet var4 = var3.executeQuery(var1);
                 cursor.execute(query)
                 
@@ -165,16 +400,70 @@ class QueryExecutor:
                 self._print_execution_message(query)
                 
                 # Java: if (var2) { this.printResultSet(var4); }
-                if print_results:
-                    self._print_result_set(cursor)
+                self._print_result_set(cursor)
+        except psycopg2.Error as e:
+            self._handle_sql_exception(e)
+
+    def execute_dump(self, query):
+        """
+        Prints the rows of a SELECT as CSV using COPY ... TO STDOUT.
+        The server formats the rows and they are copied straight to
+        stdout, without building a Python object per row. The output is
+        CSV (comma separated, server text formatting), not the " | " layout
+        of execute_query, so this is only used when asked for explicitly.
+        """
+        self._print_execution_message(query)
+        print("Result set:")
+        # Write raw bytes when stdout has a binary buffer; text streams such
+        # as StringIO or notebook outputs get decoded text from psycopg2
+        out = getattr(sys.stdout, "buffer", sys.stdout)
+        # Anything print() buffered must come out before the raw bytes
+        sys.stdout.flush()
+        try:
+            cursor = self._cur
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV HEADER", out)
+            out.flush()
+            if cursor.rowcount >= 0:
+                print(f"Number of rows: {cursor.rowcount}")
         except psycopg2.Error as e:
             self._handle_sql_exception(e)
 
+    def run_all(self, queries, before=None, print_results=True, dump=()):
+        """
+        Runs a list of (label, query) pairs in order through execute_query.
+        'before', if given, is called with each label first (e.g. to print
+        a banner). Labels in 'dump' are printed with execute_dump instead.
+        The queries still run one round-trip at a time.
+        """
+        for label, query in queries:
+            if before is not None:
+                before(label)
+            if print_results and label in dump:
+                self.execute_dump(query)
+            else:
+                self.execute_query(query, print_results)
+
     def close(self):
-        """ A helper method to properly close the connection """
+        """ A helper method to return the connection to the pool """
         if self.connection:
-            self.connection.close()
-            print("Database connection closed.")
+            try:
+                # Pooled sessions outlive us, so drop the statements we prepared
+                if self._prepared and not self.connection.closed:
+                    for name in self._prepared:
+                        # Already gone (e.g. the caller ran DEALLOCATE ALL) is fine
+                        try:
+                            self._cur.execute(f"DEALLOCATE {psycopg2.extensions.quote_ident(name, self.connection)}")
+                        except psycopg2.Error:
+                            pass
+                    self._prepared.clear()
+                # Close the cursor before handing the connection back
+                self._cur.close()
+                self._cur = None
+            finally:
+                # Always return the connection, even if the cleanup above failed
+                self._pool.putconn(self.connection)
+                self.connection = None
+            print("Database connection returned to the pool.")
 
 
 # --- Main execution block ---
@@ -185,122 +474,105 @@ if __name__ == "__main__":
     # We use 'postgres' as confirmed from your psql output
     DB_NAME = "postgres"
     
+    # Let output collect in the buffer; it is flushed once in 'finally'.
+    # Only a TextIOWrapper can be reconfigured.
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
     qe = None # Define qe outside try for the 'finally' block
     try:
         # Java: QueryExecutor var1 = new QueryExecutor("wine");
         qe = QueryExecutor(dbname=DB_NAME, schema_name="wine")
+        qe.create_indexes()
         
         # --- ALL YOUR QUERIES FROM THE FIRST SCRIPT ---
-        
-        print("////////////////////////////////")
-        print("//////////// Question 7.9E  ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT s.SUPNAME, s.SUPNR
-            FROM supplier s
-            WHERE NOT EXISTS (
-                SELECT 1 FROM purchase_order p WHERE s.SUPNR = p.SUPNR
-            )
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.11E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT SUM(available_quantity) AS TOTAL_QUANTITY
-            FROM product
-            WHERE prodtype = 'sparkling'
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.12E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT s.supnr, s.supname, COUNT(po.ponr) AS total_num_of_outstanding_orders
-            FROM supplier s
-            LEFT JOIN purchase_order po ON s.supnr = po.supnr
-            GROUP BY s.supnr, s.supname
-            ORDER BY s.supnr
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.13E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT s.supnr, COUNT(s.prodnr) AS num_of_product
-            FROM supplies s
-            GROUP BY s.supnr
-            HAVING COUNT(s.prodnr) > 5
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.14E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT s.supnr, s.supname, AVG(sp.deliv_period) AS average_delivery_time
-            FROM supplier s
-            JOIN supplies sp ON s.supnr = sp.supnr
-            GROUP BY s.supnr, s.supname
-            ORDER BY s.supnr
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.15E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT DISTINCT ponr
-            FROM po_line
-            WHERE prodnr IN (
-                SELECT p.prodnr
-                FROM product p
-                WHERE prodtype = 'sparkling' OR prodtype = 'red'
-            )
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.16E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT p1.prodnr
-            FROM product p1
-            WHERE 3 >= (
-                SELECT COUNT(p2.prodnr)
-                FROM product p2
-                WHERE p2.prodnr <= p1.prodnr
-            )
-            ORDER BY p1.prodnr ASC
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.17E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT prodname, available_quantity
-            FROM product
-            WHERE available_quantity >= ALL (
-                SELECT available_quantity
+        # Each entry is (question label, SQL), run in order by run_all()
+        QUESTIONS = [
+            ("7.9E", """
+                SELECT s.SUPNAME, s.SUPNR
+                FROM supplier s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM purchase_order p WHERE s.SUPNR = p.SUPNR
+                )
+            """),
+            ("7.11E", """
+                SELECT SUM(available_quantity) AS TOTAL_QUANTITY
+                FROM product
+                WHERE prodtype = 'sparkling'
+            """),
+            ("7.12E", """
+                SELECT s.supnr, s.supname, COUNT(po.ponr) AS total_num_of_outstanding_orders
+                FROM supplier s
+                LEFT JOIN purchase_order po ON s.supnr = po.supnr
+                GROUP BY s.supnr, s.supname
+                ORDER BY s.supnr
+            """),
+            ("7.13E", """
+                SELECT s.supnr, COUNT(s.prodnr) AS num_of_product
+                FROM supplies s
+                GROUP BY s.supnr
+                HAVING COUNT(s.prodnr) > 5
+            """),
+            ("7.14E", """
+                SELECT s.supnr, s.supname, AVG(sp.deliv_period) AS average_delivery_time
+                FROM supplier s
+                JOIN supplies sp ON s.supnr = sp.supnr
+                GROUP BY s.supnr, s.supname
+                ORDER BY s.supnr
+            """),
+            ("7.15E", """
+                SELECT DISTINCT ponr
+                FROM po_line
+                WHERE prodnr IN (
+                    SELECT p.prodnr
+                    FROM product p
+                    WHERE prodtype = 'sparkling' OR prodtype = 'red'
+                )
+            """),
+            # prodnr is the primary key, so "at most 3 products with a prodnr
+            # <= mine" is just the 3 smallest. This reads them off the key index
+            # instead of running a correlated COUNT for every row.
+            ("7.16E", """
+                SELECT prodnr
                 FROM product
-                WHERE available_quantity IS NOT NULL
-            )
-        """)
-
-        print("////////////////////////////////")
-        print("//////////// Question 7.18E ////")
-        print("////////////////////////////////")
-        qe.execute_query("""
-            SELECT s1.supname, s1.supnr
-            FROM supplier s1
-            WHERE NOT EXISTS(
-                SELECT 1
-                FROM supplier s2
-                WHERE s2.supnr < s1.supnr
-            )
-        """)
+                ORDER BY prodnr ASC
+                LIMIT 3
+            """),
+            # ">= ALL (...)" is the same as "= MAX(...)", ties included, but
+            # the aggregate is computed once instead of compared per row.
+            ("7.17E", """
+                SELECT prodname, available_quantity
+                FROM product
+                WHERE available_quantity = (
+                    SELECT MAX(available_quantity)
+                    FROM product
+                )
+            """),
+            # No supplier with a smaller supnr = the smallest supnr (it is the
+            # primary key), so a single ordered fetch replaces the anti-join.
+            ("7.18E", """
+                SELECT supname, supnr
+                FROM supplier
+                ORDER BY supnr ASC
+                LIMIT 1
+            """),
+        ]
+        # The questions with the largest results are dumped through COPY
+        qe.run_all(
+            QUESTIONS,
+            before=lambda label: sys.stdout.write(_banner(label)),
+            dump={"7.12E", "7.14E", "7.15E"},
+        )
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        # Earlier results are still buffered; get them out before stderr
+        sys.stdout.flush()
         traceback.print_exc()
+        # 'finally' still runs on SystemExit, so the connection is released
+        sys.exit(1)
     finally:
         # Always close the connection
         if qe:
-            qe.close()
\ No newline at end of file
+            qe.close()
+        sys.stdout.flush()
\ No newline at end of file